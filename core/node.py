@@ -2,6 +2,7 @@ from typing import Any
 from langchain_core.messages import AIMessage, HumanMessage, BaseMessage,ToolMessage
 from openai import InternalServerError
 from core.state import State
+from core.router import revision_requested, reviewed_node
 import logging
 import json
 import re
@@ -45,6 +46,12 @@ def agent_node(state: State, agent: AgentExecutor, name: str) -> State:
             state["quality_review"] = ai_message
             state["needs_revision"] = "revision needed" in output.lower()
             logger.info(f"Quality review updated. Needs revision: {state['needs_revision']}")
+            # Count revisions per node so QualityReview_router can cap revision loops
+            previous_node = reviewed_node(state)
+            if previous_node and revision_requested(state):
+                revision_counts = dict(state.get("revision_counts") or {})
+                revision_counts[previous_node] = revision_counts.get(previous_node, 0) + 1
+                state["revision_counts"] = revision_counts
         
         logger.info(f"Agent {name} processing completed")
         return state
@@ -3,14 +3,47 @@ from typing import Literal, Union, Dict, List, Optional
 from langchain_core.messages import AIMessage
 import logging
 import json
+import re
+import ast
+from functools import lru_cache
+
+# Prefer orjson's C parser when installed; fall back to the standard library
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used when parsing the process decision
+_NEXT_RE = re.compile(r"""['"]next['"]\s*:\s*['"]([^'"]+)['"]""")
+
 # Define types for node routing
 NodeType = Literal['Visualization', 'Search', 'Coder', 'Report', 'Process', 'NoteTaker', 'Hypothesis', 'QualityReview']
 ProcessNodeType = Literal['Coder', 'Search', 'Visualization', 'Report', 'Process', 'Refiner']
 
+# Nodes that QualityReview can send work back to for revision
+_REVISION_NODES = frozenset({"Visualization", "Search", "Coder", "Report"})
+
+# Agent names (as set in message names) of the nodes QualityReview can revise
+_AGENT_NODES = {
+    "visualization_agent": "Visualization",
+    "searcher_agent": "Search",
+    "code_agent": "Coder",
+    "report_agent": "Report",
+}
+
+# How many times QualityReview may send the same node back for revision in one run
+MAX_REVISIONS = 3
+
+# Static routing tables, built once at import time.
+# QualityReview: (revision needed, previous node) -> next node, default 'NoteTaker'
+_REVIEW_DISPATCH = {(True, node): node for node in _REVISION_NODES}
+# Process: extracted decision -> next node, default 'Process'
+_VALID_DECISIONS = frozenset(("Coder", "Search", "Visualization", "Report"))
+_PROCESS_DISPATCH = {**{decision: decision for decision in _VALID_DECISIONS}, "FINISH": "Refiner"}
+
 def hypothesis_router(state: State) -> NodeType:
     """
     Route based on the presence of a hypothesis in the state.
@@ -33,19 +66,63 @@ def hypothesis_router(state: State) -> NodeType:
             logger.debug("Hypothesis is a string")
         else:
             hypothesis_content = ""
-            logger.warning(f"Unexpected hypothesis type: {type(hypothesis)}")
+            logger.warning("Unexpected hypothesis type: %s", type(hypothesis))
             
         if not isinstance(hypothesis_content, str):
             hypothesis_content = str(hypothesis_content)
             logger.warning("Converting hypothesis content to string")
     except Exception as e:
-        logger.error(f"Error processing hypothesis: {e}")
+        logger.error("Error processing hypothesis: %s", e)
         hypothesis_content = ""
     
-    result = "Hypothesis" if not hypothesis_content.strip() else "Process"
-    logger.info(f"hypothesis_router decision: {result}")
+    result = "Hypothesis" if not hypothesis_content or hypothesis_content.isspace() else "Process"
+    logger.info("hypothesis_router decision: %s", result)
     return result
 
+def revision_requested(state: State) -> bool:
+    """
+    Check whether the latest quality review asks for a revision.
+
+    Args:
+        state (State): The current state of the system.
+
+    Returns:
+        bool: True if the last message contains 'REVISION' or needs_revision is set.
+    """
+    messages = state.get("messages", [])
+    last_message = messages[-1] if messages else None
+    content = last_message.content if last_message else None
+    
+    # Check if revision is needed without stringifying the whole message
+    if isinstance(content, str):
+        requested = 'REVISION' in content
+    elif isinstance(content, list):
+        # Content may be a list of parts: plain strings or {"type": "text", "text": ...} dicts
+        requested = any(
+            'REVISION' in part if isinstance(part, str)
+            else isinstance(part, dict) and 'REVISION' in str(part.get("text", ""))
+            for part in content
+        )
+    else:
+        requested = False
+    
+    return bool(requested or state.get("needs_revision", False))
+
+def reviewed_node(state: State) -> Optional[str]:
+    """
+    Find the node whose output the latest quality review judged.
+
+    Args:
+        state (State): The current state of the system.
+
+    Returns:
+        Optional[str]: The revisable node that wrote the message before the review, or None.
+    """
+    # "sender" is already the quality review agent; the reviewed node wrote the message before the review
+    messages = state.get("messages", [])
+    previous_agent = getattr(messages[-2], "name", None) if len(messages) > 1 else None
+    return _AGENT_NODES.get(previous_agent)
+
 def QualityReview_router(state: State) -> NodeType:
     """
     Route based on the quality review outcome and process decision.
@@ -57,25 +134,85 @@ def QualityReview_router(state: State) -> NodeType:
     NodeType: The next node to route to based on the quality review and process decision.
     """
     logger.info("Entering QualityReview_router")
-    messages = state.get("messages", [])
-    last_message = messages[-1] if messages else None
+    needs_revision = revision_requested(state)
+    previous_node = reviewed_node(state)
     
-    # Check if revision is needed
-    if (last_message and 'REVISION' in str(last_message.content)) or state.get("needs_revision", False):
-        previous_node = state.get("last_sender", "")
-        revision_routes = {
-            "Visualization": "Visualization",
-            "Search": "Search",
-            "Coder": "Coder",
-            "Report": "Report"
-        }
-        result = revision_routes.get(previous_node, "NoteTaker")
-        logger.info(f"Revision needed. Routing to: {result}")
-        return result
-    
-    else:
+    # Stop revision loops once a node has used up its revisions (counted by the quality review node)
+    revision_counts = state.get("revision_counts") or {}
+    if needs_revision and revision_counts.get(previous_node, 0) > MAX_REVISIONS:
+        logger.warning("Revision limit of %d reached for %s. Routing to: NoteTaker", MAX_REVISIONS, previous_node)
         return "NoteTaker"
     
+    result = _REVIEW_DISPATCH.get((needs_revision, previous_node), "NoteTaker")
+    if needs_revision:
+        logger.info("Revision needed. Routing to: %s", result)
+    return result
+
+def _parse_decision_fast(content: str) -> Optional[str]:
+    """
+    Fast stage of process decision parsing for well-formed payloads.
+
+    Args:
+        content (str): The stripped process decision content.
+
+    Returns:
+        Optional[str]: The 'next' value, or None if the content could not be parsed.
+    """
+    try:
+        decision_dict = _json.loads(content)
+    except (ValueError, RecursionError):  # JSONDecodeError is a ValueError; deep nesting raises RecursionError
+        # Python-dict style output, e.g. {'next': 'Coder'}
+        if "'" not in content:
+            return None
+        try:
+            decision_dict = ast.literal_eval(content)
+        except Exception:
+            # Besides ValueError/SyntaxError, literal_eval can raise TypeError (unhashable keys),
+            # RecursionError or MemoryError; all of them should fall through to the repair stage
+            return None
+
+    if not isinstance(decision_dict, dict):
+        return None
+    decision = decision_dict.get('next')
+    return str(decision) if decision is not None else None
+
+def _parse_decision_repair(content: str) -> Optional[str]:
+    """
+    Repair stage of process decision parsing for malformed payloads.
+
+    Args:
+        content (str): The stripped process decision content.
+
+    Returns:
+        Optional[str]: The 'next' value extracted with a regex, or None if not found.
+    """
+    logger.debug("JSON parse failed. Extracting next value manually.")
+    match = _NEXT_RE.search(content)
+    return match.group(1) if match else None
+
+@lru_cache(maxsize=128)
+def _decide_from_content(content: str) -> str:
+    """
+    Extract the decision string from process decision content.
+
+    Results are memoized (with a bounded cache) since langgraph may route on the
+    same process decision several times.
+
+    Args:
+        content (str): The raw process decision content.
+
+    Returns:
+        str: The extracted decision, or the stripped content if no 'next' value is found.
+    """
+    content = content.strip()
+
+    # Skip JSON parsing if content doesn't look like JSON
+    if not content or content[0] != '{':
+        logger.debug("Content doesn't look like JSON, using content directly")
+        return content
+
+    # If no 'next' key found, use the whole content
+    return _parse_decision_fast(content) or _parse_decision_repair(content) or content
 
 def process_router(state: State) -> ProcessNodeType:
     """
@@ -89,71 +226,37 @@ def process_router(state: State) -> ProcessNodeType:
     """
     logger.info("Entering process_router")
     process_decision: Union[AIMessage, Dict, str, None] = state.get("process_decision", "")
-    logger.debug(f"Process decision type: {type(process_decision)}")
-    if hasattr(process_decision, 'content'):
-        logger.debug(f"Process decision content: {repr(process_decision.content[:100])}")  # Show first 100 chars
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Process decision type: %s", type(process_decision))
+        if hasattr(process_decision, 'content'):
+            logger.debug("Process decision content: %r", process_decision.content[:100])  # Show first 100 chars
     
     decision_str: str = ""
     
     try:
         if isinstance(process_decision, AIMessage):
             logger.debug("Process decision is an AIMessage")
-            content = process_decision.content.strip()
-            
-            # Skip JSON parsing if content doesn't look like JSON
-            if not (content.startswith('{') and content.endswith('}')):
-                logger.debug("Content doesn't look like JSON, using content directly")
-                decision_str = content
-            else:
-                try:
-                    # First try to parse as valid JSON
-                    decision_dict = json.loads(content)
-                    decision_str = str(decision_dict.get('next', ''))
-                except json.JSONDecodeError:
-                    try:
-                        # Try replacing single quotes with double quotes
-                        content_fixed = content.replace("'", '"')
-                        decision_dict = json.loads(content_fixed)
-                        decision_str = str(decision_dict.get('next', ''))
-                    except json.JSONDecodeError as e:
-                        logger.debug(f"JSON parse failed: {e}. Extracting next value manually.")
-                        # Try to extract the value after next using regex
-                        import re
-                        match = re.search(r"['\"]next['\"]:\s*['\"]([^'\"]+)['\"]", content)
-                        if match:
-                            decision_str = match.group(1)
-                        else:
-                            # If no 'next' key found, use the whole content
-                            decision_str = content
-                            
+            decision_str = _decide_from_content(process_decision.content)
+
         elif isinstance(process_decision, dict):
             decision_str = str(process_decision.get('next', ''))
         else:
             decision_str = str(process_decision)
     except Exception as e:
-        logger.error(f"Error processing decision: {e}")
+        logger.error("Error processing decision: %s", e)
         decision_str = ""
     
-    # Define valid decisions
-    valid_decisions = {"Coder", "Search", "Visualization", "Report"}
-    
-    logger.debug(f"Extracted decision string: '{decision_str}'")
-    
-    if decision_str in valid_decisions:
-        logger.info(f"Valid process decision: {decision_str}")
-        return decision_str
+    logger.debug("Extracted decision string: '%s'", decision_str)
     
-    if decision_str == "FINISH":
+    result = _PROCESS_DISPATCH.get(decision_str, "Process")
+    if result == "Refiner":
         logger.info("Process decision is FINISH. Ending process.")
-        return "Refiner"
-    
-    # If decision_str is empty or not a valid decision, return "Process"
-    if not decision_str or decision_str not in valid_decisions:
-        logger.debug(f"Invalid or empty process decision: '{decision_str}' (from {type(process_decision)}). Valid options: {valid_decisions}. Defaulting to 'Process'.")
-        return "Process"
-    
-    # Default to "Process"
-    logger.info("Defaulting to 'Process'")
-    return "Process"
+    elif result != "Process":
+        logger.info("Valid process decision: %s", decision_str)
+    else:
+        # If decision_str is empty or not a valid decision, return "Process"
+        logger.debug("Invalid or empty process decision: '%s' (from %s). Valid options: %s. Defaulting to 'Process'.",
+                     decision_str, type(process_decision), sorted(_VALID_DECISIONS))
+    return result
 
 logger.info("Router module initialized")
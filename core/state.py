@@ -1,5 +1,5 @@
 from langchain_core.messages import BaseMessage
-from typing import Sequence, TypedDict
+from typing import Dict, Sequence, TypedDict
 from pydantic import BaseModel, Field
 
 class State(TypedDict):
@@ -36,6 +36,9 @@ class State(TypedDict):
     
     # The identifier of the agent who sent the last message
     sender: str = ""
+    
+    # How many times QualityReview has sent each node back for revision
+    revision_counts: Dict[str, int] = {}
 
 class NoteState(BaseModel):
     """Pydantic model for the entire state structure."""
@@ -61,9 +61,6 @@ def create_agent(
     tool_names = ", ".join([tool.name for tool in tools])
     team_members_str = ", ".join(team_members)
 
-    # List the initial contents of the working directory
-    initial_directory_contents = list_directory_contents(working_directory)
-
     # Create the system prompt for the agent
     system_prompt = (
         "You are a specialized AI assistant in a data analysis team. "
@@ -77,7 +74,7 @@ def create_agent(
         "Do not ask for clarification. "
         "Your other team members (and other teams) will collaborate with you based on their specialties. "
         f"You are chosen for a reason! You are one of the following team members: {team_members_str}.\n"
-        f"The initial contents of your working directory are:\n{initial_directory_contents}\n"
+        "The current contents of your working directory are:\n{directory_contents}\n"
         "Use the ListDirectoryContents tool to check for updates in the directory contents when needed."
     )
 
@@ -97,6 +94,10 @@ def create_agent(
         MessagesPlaceholder(variable_name="agent_scratchpad"),
     ])
 
+    # List the working directory each time the prompt is formatted, not once when the agent is built,
+    # so agents shared across runs and sessions see uploads and files from earlier runs
+    prompt = prompt.partial(directory_contents=lambda: list_directory_contents(working_directory))
+
     # Create the agent using the defined prompt and tools
     agent = create_openai_functions_agent(llm=llm, tools=tools, prompt=prompt)
     
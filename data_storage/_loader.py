@@ -0,0 +1,42 @@
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import pandas as pd
+
+CSV_PATH = 'OnlineSalesData.csv'
+PARQUET_PATH = 'OnlineSalesData.parquet'
+PREPROCESSOR_PATH = 'preprocessor.joblib'
+PREPROCESSED_PATH = 'preprocessed.parquet'
+
+
+def cache_is_fresh(path: str) -> bool:
+    """Return True if the cached file at path exists and is not older than the sales CSV (if any)."""
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(CSV_PATH) or os.path.getmtime(path) >= os.path.getmtime(CSV_PATH)
+
+
+def _refresh_parquet() -> None:
+    """Convert the sales CSV to parquet if the parquet copy is missing or older than the CSV."""
+    if cache_is_fresh(PARQUET_PATH):
+        return
+    data = pd.read_csv(CSV_PATH, engine='pyarrow', parse_dates=['Date'])
+    data.to_parquet(PARQUET_PATH, index=False)
+
+
+@lru_cache(maxsize=None)
+def load_sales(columns: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    """
+    Load the sales data, parsing the CSV only once and reading the cached parquet afterwards.
+
+    The returned frame is shared between callers; take a copy before modifying it.
+
+    Args:
+        columns (Optional[Tuple[str, ...]]): Columns to load, or None for all columns.
+
+    Returns:
+        pd.DataFrame: The sales data with 'Date' already parsed.
+    """
+    _refresh_parquet()
+    return pd.read_parquet(PARQUET_PATH, columns=list(columns) if columns else None)
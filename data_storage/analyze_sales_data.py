@@ -1,8 +1,8 @@
-import pandas as pd
+from _loader import load_sales
 
-# Load the dataset
-file_path = 'OnlineSalesData.csv'
-data = pd.read_csv(file_path)
+# Load the full dataset; the overview and missing-value report cover every column
+data = load_sales().copy(deep=False)
+data['Product Category'] = data['Product Category'].astype('category')
 
 # Display basic information about the dataset
 print('Data Overview:')
@@ -10,18 +10,21 @@ print(data.info())
 
 # Check for missing values
 print('\nMissing Values:')
-print(data.isnull().sum())
+print(len(data) - data.count())
 
-# Group data by Product Category and calculate total revenue for each category
-grouped_data = data.groupby('Product Category')['Total Revenue'].sum().reset_index()
+# Group data by Product Category and calculate total and mean revenue in a single pass
+revenue_stats = data.groupby('Product Category', sort=False, observed=True)['Total Revenue'].agg(['sum', 'mean']).reset_index()
+
+# Total revenue for each category
+grouped_data = revenue_stats[['Product Category', 'sum']].rename(columns={'sum': 'Total Revenue'})
 
 # Display the grouped data
 print('\nTotal Revenue by Product Category:')
 print(grouped_data)
 
 # Perform a basic statistical analysis
-# Calculate mean revenue for each category
-mean_revenue = data.groupby('Product Category')['Total Revenue'].mean().reset_index()
+# Mean revenue for each category
+mean_revenue = revenue_stats[['Product Category', 'mean']].rename(columns={'mean': 'Total Revenue'})
 
 # Display the mean revenue by category
 print('\nMean Revenue by Product Category:')
@@ -1,13 +1,17 @@
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
+from _loader import load_sales
 
 # Load the sales data
-data = pd.read_csv('OnlineSalesData.csv')
+data = load_sales(('Product Category', 'Total Revenue')).copy(deep=False)
+
+# Aggregate total revenue per product category
+category_revenue = data.groupby('Product Category', sort=False)['Total Revenue'].sum()
 
 # Create a bar plot for total revenue by product category
 plt.figure(figsize=(12, 6))
-sns.barplot(x='Product Category', y='Total Revenue', data=data, palette='viridis')
+plt.bar(category_revenue.index, category_revenue.values,
+        color=plt.cm.viridis(np.linspace(0, 1, len(category_revenue))))
 plt.title('Total Revenue by Product Category')
 plt.xlabel('Product Category')
 plt.ylabel('Total Revenue')
@@ -1,7 +1,8 @@
 import pandas as pd
 
 # Load the sales data
-data = pd.read_csv('OnlineSalesData.csv')
+# Only the header is needed to list the columns
+data = pd.read_csv('OnlineSalesData.csv', nrows=0)
 
 # Display the column names of the dataframe
 print(data.columns)
\ No newline at end of file
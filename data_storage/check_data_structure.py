@@ -1,9 +1,8 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 # Load the sales data
-data = pd.read_csv('OnlineSalesData.csv')
+# Only the first rows are displayed, so don't parse the rest of the file
+data = pd.read_csv('OnlineSalesData.csv', nrows=5)
 
 # Display the first few rows of the dataframe to understand its structure
 print(data.head())
\ No newline at end of file
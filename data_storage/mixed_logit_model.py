@@ -3,15 +3,19 @@ import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
+from _loader import cache_is_fresh, PREPROCESSED_PATH
 
 # Load preprocessed data
-# Assuming 'preprocessed_df' is available from the previous script
-# For demonstration, let's simulate a small part of it
 np.random.seed(0)
-preprocessed_df = pd.DataFrame(np.random.rand(100, 10), columns=[f'feature_{i}' for i in range(10)])
+if cache_is_fresh(PREPROCESSED_PATH):
+    # Reuse the frame cached by preprocess_data.py instead of re-fitting the preprocessor
+    preprocessed_df = pd.read_parquet(PREPROCESSED_PATH)
+else:
+    # For demonstration, let's simulate a small part of it
+    preprocessed_df = pd.DataFrame(np.random.rand(100, 10), columns=[f'feature_{i}' for i in range(10)])
 
 # Simulate a binary target variable for classification
-preprocessed_df['target'] = np.random.choice([0, 1], size=100)
+preprocessed_df['target'] = np.random.choice([0, 1], size=len(preprocessed_df))
 
 # Split the data into training and testing sets
 X = preprocessed_df.drop('target', axis=1)
@@ -19,7 +23,13 @@ y = preprocessed_df['target']
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # Initialize and fit a logistic regression model
-model = LogisticRegression(max_iter=1000)
+# liblinear suits small dense problems; saga scales better to large data (features are already scaled)
+if len(X_train) <= 10000:
+    model = LogisticRegression(solver='liblinear', max_iter=200, random_state=0)
+else:
+    # saga fits float32 input directly (liblinear would upcast it to float64)
+    X_train, X_test = X_train.astype(np.float32), X_test.astype(np.float32)
+    model = LogisticRegression(solver='saga', penalty='l2', max_iter=200, random_state=0)
 model.fit(X_train, y_train)
 
 # Predict on the test set
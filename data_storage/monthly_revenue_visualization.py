@@ -1,17 +1,12 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from _loader import load_sales
 
-# Load the data
-file_path = 'OnlineSalesData.csv'
-df = pd.read_csv(file_path)
-
-df['Date'] = pd.to_datetime(df['Date'])
-
-df['Total Revenue'] = df['Total Revenue'].astype(float)
+# Load the data (Date is already parsed by the loader)
+df = load_sales(('Date', 'Total Revenue')).copy(deep=False)
 
 # Group by month and sum the total revenue
-monthly_revenue = df.resample('M', on='Date').sum()['Total Revenue']
+monthly_revenue = df.set_index('Date')['Total Revenue'].resample('ME').sum()
 
 # Create a line plot for monthly revenue trends
 plt.figure(figsize=(12, 6))
@@ -1,38 +1,59 @@
 import pandas as pd
+import numpy as np
+from scipy import sparse
+import joblib
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-
-# Load the data
-data = pd.read_csv('OnlineSalesData.csv')
+from _loader import load_sales, cache_is_fresh, PREPROCESSOR_PATH, PREPROCESSED_PATH
 
 # Define preprocessing steps
 numerical_features = ['Units Sold', 'Unit Price', 'Total Revenue']
 categorical_features = ['Product Category', 'Region', 'Payment Method']
 
-# Create transformers
-numerical_transformer = Pipeline(steps=[
-    ('imputer', SimpleImputer(strategy='median')),
-    ('scaler', StandardScaler())
-])
-
-categorical_transformer = Pipeline(steps=[
-    ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
-    ('onehot', OneHotEncoder(handle_unknown='ignore'))
-])
-
-# Combine transformers into a single ColumnTransformer
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('num', numerical_transformer, numerical_features),
-        ('cat', categorical_transformer, categorical_features)
+if cache_is_fresh(PREPROCESSOR_PATH) and cache_is_fresh(PREPROCESSED_PATH):
+    # The sales CSV has not changed since the last run: reuse the fitted preprocessor and its output
+    preprocessor = joblib.load(PREPROCESSOR_PATH)
+    preprocessed_df = pd.read_parquet(PREPROCESSED_PATH)
+else:
+    # Load only the columns used by the preprocessor
+    data = load_sales(tuple(numerical_features + categorical_features)).copy(deep=False)
+    data[categorical_features] = data[categorical_features].astype('category')
+    data[numerical_features] = data[numerical_features].astype(np.float32)
+
+    # Create transformers
+    numerical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
     ])
 
-# Preprocess the data
-preprocessed_data = preprocessor.fit_transform(data)
-
-# Convert the preprocessed data back to a DataFrame
-preprocessed_df = pd.DataFrame(preprocessed_data)
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=True, dtype=np.float32))
+    ])
 
-preprocessed_df.head()
\ No newline at end of file
+    # Combine transformers into a single ColumnTransformer
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', numerical_transformer, numerical_features),
+            ('cat', categorical_transformer, categorical_features)
+        ],
+        # Keep the one-hot output sparse regardless of overall density
+        sparse_threshold=1.0)
+
+    # Preprocess the data
+    preprocessed_data = preprocessor.fit_transform(data)
+
+    # Convert the preprocessed data back to a DataFrame without densifying it
+    if sparse.issparse(preprocessed_data):
+        preprocessed_df = pd.DataFrame.sparse.from_spmatrix(preprocessed_data)
+    else:
+        preprocessed_df = pd.DataFrame(preprocessed_data)
+
+    # Cache the fitted preprocessor and transformed data for later runs and downstream scripts
+    joblib.dump(preprocessor, PREPROCESSOR_PATH)
+    dense_data = preprocessed_data.toarray() if sparse.issparse(preprocessed_data) else preprocessed_data
+    pd.DataFrame(dense_data, columns=preprocessor.get_feature_names_out()).to_parquet(PREPROCESSED_PATH, index=False)
+
+preprocessed_df.head()
@@ -1,13 +1,13 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from _loader import load_sales
 
 # Load the dataset
-file_path = 'OnlineSalesData.csv'
-df = pd.read_csv(file_path)
+df = load_sales(('Product Category', 'Total Revenue')).copy(deep=False)
+df['Product Category'] = df['Product Category'].astype('category')
 
 # Group by product category and calculate total and mean revenue
-revenue_summary = df.groupby('Product Category')['Total Revenue'].agg(['sum', 'mean']).reset_index()
+revenue_summary = df.groupby('Product Category', observed=True)['Total Revenue'].agg(['sum', 'mean']).reset_index()
 
 # Rename columns for clarity
 revenue_summary.columns = ['Product Category', 'Total Revenue', 'Mean Revenue']
@@ -17,7 +17,7 @@ sns.set(style='whitegrid')
 
 # Create a bar plot for total revenue
 plt.figure(figsize=(12, 6))
-sns.barplot(x='Total Revenue', y='Product Category', data=revenue_summary, palette='viridis')
+sns.barplot(x='Total Revenue', y='Product Category', data=revenue_summary, palette='viridis', errorbar=None)
 plt.title('Total Revenue by Product Category')
 plt.xlabel('Total Revenue ($)')
 plt.ylabel('Product Category')
@@ -26,7 +26,7 @@ plt.close()
 
 # Create a bar plot for mean revenue
 plt.figure(figsize=(12, 6))
-sns.barplot(x='Mean Revenue', y='Product Category', data=revenue_summary, palette='viridis')
+sns.barplot(x='Mean Revenue', y='Product Category', data=revenue_summary, palette='viridis', errorbar=None)
 plt.title('Mean Revenue by Product Category')
 plt.xlabel('Mean Revenue ($)')
 plt.ylabel('Product Category')
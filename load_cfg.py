@@ -9,6 +9,8 @@ LANGCHAIN_API_KEY = os.getenv('LANGCHAIN_API_KEY')
 FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
 # Get working directory from environment variable
 WORKING_DIRECTORY = os.getenv('WORKING_DIRECTORY', 'data_storage/')
+# Get the web scrape cache directory (kept outside the agents' working directory)
+SCRAPE_CACHE_DIR = os.getenv('SCRAPE_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'analyticsflow', 'scrape'))
 # Get Conda-related paths from environment variables
 CONDA_PATH = os.getenv('CONDA_PATH', '/home/user/anaconda3')
 CONDA_ENV = os.getenv('CONDA_ENV', 'base')
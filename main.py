@@ -45,7 +45,6 @@ class MultiAgentSystem:
                 "report_section": "",
                 "quality_review": "",
                 "needs_revision": False,
-                "last_sender": "",
             },
             {"configurable": {"thread_id": "1"}, "recursion_limit": 3000},
             stream_mode="values",
@@ -1,17 +1,15 @@
 import streamlit as st
 import os
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import asyncio
 import threading
 import queue
 import time
-from typing import Dict, Any
+from collections import deque
+from typing import Dict, Any, List, Tuple
 import io
-import sys
 import json
+from PIL import Image
 
 # Import project modules
 from logger import setup_logger
@@ -85,15 +83,48 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Graph run configuration for analysis runs
+STREAM_CONFIG = {"configurable": {"thread_id": "1"}, "recursion_limit": 3000}
+
+# Only the most recent events are kept in the session to bound memory on long runs
+MAX_STORED_EVENTS = 100
+
+# Seconds between reruns that collect events from a background analysis run
+ANALYSIS_POLL_INTERVAL = 0.5
+
+# Sidebar agent overview; the cards are rendered once and sent as a single markdown element
+AGENTS = [
+    ("📊 Process Agent", "Coordination & supervision"),
+    ("🔍 Search Agent", "Information retrieval"),
+    ("📈 Visualization Agent", "Chart creation"),
+    ("💻 Code Agent", "Code writing & execution"),
+    ("📝 Report Agent", "Report generation"),
+    ("✅ Quality Review Agent", "Quality assurance"),
+    ("🔧 Refiner Agent", "Result refinement"),
+    ("💡 Hypothesis Agent", "Hypothesis development"),
+    ("📋 Note Agent", "Notes & summaries")
+]
+AGENT_CARDS_HTML = "".join(
+    f'<div class="agent-card"><strong>{name}</strong><br><small>{description}</small></div>'
+    for name, description in AGENTS
+)
+
+@st.cache_resource
+def get_logger():
+    """Configure the logger once per process instead of on every rerun"""
+    return setup_logger()
+
 class StreamlitMultiAgentSystem:
     def __init__(self):
-        self.logger = setup_logger()
+        self.logger = get_logger()
         self.setup_environment()
         self.lm_manager = LanguageModelManager()
         self.workflow_manager = WorkflowManager(
             language_models=self.lm_manager.get_models(),
             working_directory=WORKING_DIRECTORY
         )
+        # The workflow is compiled once; reuse it for every analysis
+        self.graph = self.workflow_manager.get_graph()
         
     def setup_environment(self):
         """Initialize environment variables"""
@@ -106,133 +137,229 @@ class StreamlitMultiAgentSystem:
             os.makedirs(WORKING_DIRECTORY)
             self.logger.info(f"Created working directory: {WORKING_DIRECTORY}")
     
-    def run_analysis(self, user_input: str, progress_callback=None):
-        """Run the multi-agent system with progress tracking"""
+    def _build_initial_state(self, user_input: str) -> Dict[str, Any]:
+        """Create the initial graph state for a user request"""
+        # Create initial message with proper validation
         try:
-            graph = self.workflow_manager.get_graph()
-            
-            # Create initial message with proper validation
-            try:
-                initial_message = HumanMessage(content=user_input)
-            except Exception as msg_error:
-                self.logger.error(f"Error creating initial message: {str(msg_error)}")
-                # Fallback to dict format with proper type
-                initial_message = {"type": "human", "content": user_input}
-            
-            initial_state = {
-                "messages": [initial_message],
-                "hypothesis": "",
-                "process_decision": "",
-                "process": "",
-                "visualization_state": "",
-                "searcher_state": "",
-                "code_state": "",
-                "report_section": "",
-                "quality_review": "",
-                "needs_revision": False,
-                "last_sender": "",
-            }
-            
-            events = graph.stream(
-                initial_state,
-                {"configurable": {"thread_id": "1"}, "recursion_limit": 3000},
+            initial_message = HumanMessage(content=user_input)
+        except Exception as msg_error:
+            self.logger.error(f"Error creating initial message: {str(msg_error)}")
+            # Fallback to dict format with proper type
+            initial_message = {"type": "human", "content": user_input}
+        
+        return {
+            "messages": [initial_message],
+            "hypothesis": "",
+            "process_decision": "",
+            "process": "",
+            "visualization_state": "",
+            "searcher_state": "",
+            "code_state": "",
+            "report_section": "",
+            "quality_review": "",
+            "needs_revision": False,
+        }
+    
+    def _fix_messages(self, messages):
+        """Return messages with dict messages validated and fixed"""
+        fixed_messages = []
+        for msg in messages:
+            if isinstance(msg, dict):
+                # Ensure dict messages have required fields
+                if "content" in msg:
+                    if "type" not in msg:
+                        msg["type"] = "ai"  # Default type for missing type
+                    elif msg.get("type") not in ["human", "ai", "system"]:
+                        msg["type"] = "ai"  # Fix invalid types
+                    # Ensure name field exists for AI messages
+                    if msg["type"] == "ai" and "name" not in msg:
+                        msg["name"] = "assistant"
+                else:
+                    # Skip messages without content
+                    continue
+            fixed_messages.append(msg)
+        return fixed_messages
+    
+    def _fix_event_messages(self, event, seen):
+        """Validate and fix messages in event before processing.
+
+        Nodes append to the same message list, so only messages added since the previous
+        event are validated; seen carries the previous list, its length and its fixed copy.
+        """
+        messages = event.get("messages")
+        if not messages:
+            return
+        if messages is seen.get("messages") and len(messages) >= seen["length"]:
+            fixed_messages = seen["fixed"] + self._fix_messages(messages[seen["length"]:])
+        else:
+            # First event, or the list was replaced (e.g. trimmed by the note agent)
+            fixed_messages = self._fix_messages(messages)
+        seen.update(messages=messages, length=len(messages), fixed=fixed_messages)
+        event["messages"] = fixed_messages
+    
+    def run_analysis(self, user_input: str):
+        """Run the multi-agent system, yielding each graph event as it arrives"""
+        seen = {}
+        try:
+            events = self.graph.stream(
+                self._build_initial_state(user_input),
+                STREAM_CONFIG,
                 stream_mode="values",
                 debug=False
             )
             
-            results = []
             for event in events:
                 try:
-                    # Validate and fix messages in event before processing
-                    if "messages" in event and event["messages"]:
-                        fixed_messages = []
-                        for msg in event["messages"]:
-                            if isinstance(msg, dict):
-                                # Ensure dict messages have required fields
-                                if "content" in msg:
-                                    if "type" not in msg:
-                                        msg["type"] = "ai"  # Default type for missing type
-                                    elif msg.get("type") not in ["human", "ai", "system"]:
-                                        msg["type"] = "ai"  # Fix invalid types
-                                    # Ensure name field exists for AI messages
-                                    if msg["type"] == "ai" and "name" not in msg:
-                                        msg["name"] = "assistant"
-                                else:
-                                    # Skip messages without content
-                                    continue
-                            fixed_messages.append(msg)
-                        event["messages"] = fixed_messages
-                    
-                    if progress_callback:
-                        progress_callback(event)
-                    results.append(event)
-                    
+                    self._fix_event_messages(event, seen)
                 except Exception as event_error:
                     self.logger.error(f"Error processing event: {str(event_error)}")
                     # Continue processing despite individual event errors
                     continue
-                
-            return results
+                yield event
             
         except Exception as e:
             self.logger.error(f"Error running analysis: {str(e)}")
-            return None
+            raise
+
+@st.cache_resource
+def get_system() -> StreamlitMultiAgentSystem:
+    """Build the language models and workflow graph once per process, shared by all sessions"""
+    return StreamlitMultiAgentSystem()
+
+def _run_analysis_worker(system: StreamlitMultiAgentSystem, user_input: str, events_queue: queue.Queue):
+    """Run an analysis off the script thread, pushing each event (or the raised error) onto the queue"""
+    # Only the queue is touched here, never Streamlit
+    try:
+        for event in system.run_analysis(user_input):
+            events_queue.put(event)
+    except Exception as e:
+        events_queue.put(e)
+
+def drain_analysis_events() -> bool:
+    """Move events queued by the background run into session state.
+
+    Returns True while the run is still in progress.
+    """
+    analysis_thread = st.session_state.get("analysis_thread")
+    if analysis_thread is None:
+        return False
+    
+    # Check liveness before draining so events queued just before the worker exits are not missed
+    running = analysis_thread.is_alive()
+    events_queue = st.session_state.events_queue
+    while True:
+        try:
+            event = events_queue.get_nowait()
+        except queue.Empty:
+            break
+        if isinstance(event, Exception):
+            st.session_state.current_status = "error"
+            st.session_state.analysis_error = str(event)
+            continue
+        st.session_state.analysis_results.append(event)
+        st.session_state.event_count += 1
+    
+    if running:
+        return True
+    st.session_state.analysis_thread = None
+    if st.session_state.current_status == "processing":
+        st.session_state.current_status = "completed" if st.session_state.analysis_results else "error"
+    return False
+
+_JSON_DECODER = json.JSONDecoder()
 
 def safe_json_parse(text):
     """Safely parse JSON with fallback handling"""
     try:
         return json.loads(text)
-    except json.JSONDecodeError as e:
-        # Try to extract JSON from text if it's embedded
-        start = text.find('{')
-        end = text.rfind('}') + 1
-        if start != -1 and end != 0:
-            try:
-                return json.loads(text[start:end])
-            except:
-                pass
-        # Return the original text if parsing fails
-        return text
+    except json.JSONDecodeError:
+        pass
+    # Try to extract the first JSON object embedded in the text, decoding in place
+    idx = text.find('{')
+    while idx != -1:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, idx)
+            return obj
+        except json.JSONDecodeError:
+            idx = text.find('{', idx + 1)
+    # Return the original text if parsing fails
+    return text
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_and_profile_upload(file_id: str, _data: memoryview) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Read an uploaded CSV once and return a preview plus basic statistics.
+
+    file_id changes with every upload and is the cache key; the raw bytes are not hashed.
+    """
+    df = pd.read_csv(io.BytesIO(_data), engine="pyarrow")
+    if df.dtypes.nunique() <= 1:
+        # Homogeneous frame: one vectorized pass over the underlying array
+        missing = int(pd.isna(df.to_numpy()).sum())
+    else:
+        # Mixed dtypes: count per column to avoid casting everything to object
+        missing = int(sum(df[c].isna().sum() for c in df.columns))
+    stats = {
+        "rows": len(df),
+        "cols": len(df.columns),
+        "missing": missing,
+    }
+    return df.head(50), stats
+
+@st.cache_data(show_spinner=False, ttl=5, max_entries=16)
+def list_working_files(mtime: float) -> List[Tuple[str, int]]:
+    """List (file name, size) pairs in the working directory.
+
+    mtime is the working directory's modification time and is only used as the cache key.
+    It does not change when an existing file is rewritten in place, so entries also expire
+    after a few seconds to pick up new sizes.
+    """
+    # A single scandir pass; DirEntry caches the type and stat results
+    with os.scandir(WORKING_DIRECTORY) as it:
+        return [(e.name, e.stat().st_size) for e in it if e.is_file()]
+
+@st.cache_data(show_spinner=False)
+def thumbnail(path: str, mtime: float, max_w: int = 1200) -> bytes:
+    """Downscale an image once and return the encoded bytes.
+
+    JPEG sources stay JPEG (converted to RGB, e.g. from CMYK); everything else is encoded as PNG.
+    mtime is only used as part of the cache key.
+    """
+    with Image.open(path) as img:
+        img_format = "JPEG" if img.format == "JPEG" else "PNG"
+        if img_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.thumbnail((max_w, max_w))
+        buffer = io.BytesIO()
+        img.save(buffer, format=img_format)
+    return buffer.getvalue()
 
 def main():
     # Header
     st.markdown('<h1 class="main-header">🤖 AnalyticsFlow - Multi-Agent Data Analysis System</h1>', unsafe_allow_html=True)
     
-    # Initialize session state
-    if 'system' not in st.session_state:
-        st.session_state.system = StreamlitMultiAgentSystem()
+    # Initialize shared system and session state
+    system = get_system()
     
     if 'analysis_results' not in st.session_state:
-        st.session_state.analysis_results = []
+        st.session_state.analysis_results = deque(maxlen=MAX_STORED_EVENTS)
+    
+    # Total events seen in the current run, including those dropped from analysis_results
+    if 'event_count' not in st.session_state:
+        st.session_state.event_count = 0
     
     if 'current_status' not in st.session_state:
         st.session_state.current_status = "ready"
     
+    # Collect whatever the background analysis run has produced since the last rerun
+    analysis_running = drain_analysis_events()
+    
     # Sidebar
     with st.sidebar:
         st.markdown("## 🎯 Key Features")
         
         # Agent status overview
         st.markdown("### 🤖 Agent Status")
-        agents = [
-            ("📊 Process Agent", "Coordination & supervision"),
-            ("🔍 Search Agent", "Information retrieval"),
-            ("📈 Visualization Agent", "Chart creation"),
-            ("💻 Code Agent", "Code writing & execution"),
-            ("📝 Report Agent", "Report generation"),
-            ("✅ Quality Review Agent", "Quality assurance"),
-            ("🔧 Refiner Agent", "Result refinement"),
-            ("💡 Hypothesis Agent", "Hypothesis development"),
-            ("📋 Note Agent", "Notes & summaries")
-        ]
-        
-        for agent_name, description in agents:
-            st.markdown(f"""
-            <div class="agent-card">
-                <strong>{agent_name}</strong><br>
-                <small>{description}</small>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(AGENT_CARDS_HTML, unsafe_allow_html=True)
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -248,32 +375,28 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Save uploaded file
-            file_path = os.path.join(WORKING_DIRECTORY, uploaded_file.name)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
             # Display file info
             st.success(f"✅ File uploaded: {uploaded_file.name}")
             
             # Preview data
             try:
-                df = pd.read_csv(file_path)
+                # Profile straight from the uploaded buffer; the file is only written to disk on analysis
+                preview_df, stats = load_and_profile_upload(uploaded_file.file_id, uploaded_file.getbuffer())
                 st.markdown("### 👀 Data Preview")
-                st.dataframe(df.head(), use_container_width=True)
+                st.dataframe(preview_df.head(), use_container_width=True)
                 
                 # Basic statistics
                 st.markdown("### 📊 Basic Statistics")
                 col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
                 
                 with col_stat1:
-                    st.metric("Rows", len(df))
+                    st.metric("Rows", stats["rows"])
                 with col_stat2:
-                    st.metric("Columns", len(df.columns))
+                    st.metric("Columns", stats["cols"])
                 with col_stat3:
                     st.metric("Size (MB)", f"{uploaded_file.size / (1024*1024):.2f}")
                 with col_stat4:
-                    st.metric("Missing Data", df.isnull().sum().sum())
+                    st.metric("Missing Data", stats["missing"])
                     
             except Exception as e:
                 st.error(f"Error reading file: {str(e)}")
@@ -311,39 +434,42 @@ def main():
             user_input = f"datapath:{uploaded_file.name}\n{user_input}"
         
         # Analysis execution
-        if st.button("🚀 Start Analysis", type="primary", use_container_width=True):
+        if st.button("🚀 Start Analysis", type="primary", use_container_width=True, disabled=analysis_running):
             if not user_input.strip():
                 st.error("Please enter analysis requirements!")
             else:
-                st.session_state.current_status = "processing"
+                # Persist the upload so the agents can read it from the working directory
+                if uploaded_file is not None:
+                    with open(os.path.join(WORKING_DIRECTORY, uploaded_file.name), "wb") as f:
+                        f.write(uploaded_file.getbuffer())
                 
-                # Create progress tracking
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+                st.session_state.analysis_results = deque(maxlen=MAX_STORED_EVENTS)
+                st.session_state.event_count = 0
+                st.session_state.analysis_error = None
+                st.session_state.current_status = "processing"
                 
-                with st.spinner("Analyzing data..."):
-                    def progress_callback(event):
-                        # Update progress based on event
-                        if "last_sender" in event:
-                            sender = event.get("last_sender", "")
-                            status_text.markdown(f"🔄 Processing: {sender}")
-                    
-                    try:
-                        results = st.session_state.system.run_analysis(user_input, progress_callback)
-                        
-                        if results:
-                            st.session_state.analysis_results = results
-                            st.session_state.current_status = "completed"
-                            progress_bar.progress(100)
-                            status_text.markdown("✅ Analysis completed!")
-                            st.success("🎉 Analysis completed! See results below.")
-                        else:
-                            st.session_state.current_status = "error"
-                            st.error("❌ Error occurred during analysis.")
-                            
-                    except Exception as e:
-                        st.session_state.current_status = "error"
-                        st.error(f"❌ Error: {str(e)}")
+                # Run the graph on a worker thread kept in session state; later reruns drain its queue
+                events_queue = queue.Queue()
+                st.session_state.events_queue = events_queue
+                st.session_state.analysis_thread = threading.Thread(
+                    target=_run_analysis_worker,
+                    args=(system, user_input, events_queue),
+                    daemon=True
+                )
+                st.session_state.analysis_thread.start()
+                st.rerun()
+        
+        # Progress of the current or most recent run
+        if analysis_running:
+            latest = st.session_state.analysis_results[-1] if st.session_state.analysis_results else {}
+            sender = latest.get("sender", "")
+            st.markdown(f"🔄 Processing: {sender}" if sender else "🔄 Analyzing data...")
+        elif st.session_state.get("analysis_error"):
+            st.error(f"❌ Error: {st.session_state.analysis_error}")
+        elif st.session_state.current_status == "completed":
+            st.success("🎉 Analysis completed! See results below.")
+        elif st.session_state.current_status == "error":
+            st.error("❌ Error occurred during analysis.")
     
     with col2:
         st.markdown("## 📊 System Status")
@@ -375,7 +501,7 @@ def main():
         # Quick stats
         if st.session_state.analysis_results:
             st.markdown("### 📈 Analysis Statistics")
-            st.metric("Processing Steps", len(st.session_state.analysis_results))
+            st.metric("Processing Steps", st.session_state.event_count)
     
     # Results section
     if st.session_state.analysis_results:
@@ -413,11 +539,12 @@ def main():
         with tab2:
             st.markdown("### 💬 Details Processing Steps")
             
-            # Display all messages in chronological order
-            for i, result in enumerate(st.session_state.analysis_results):
+            # Display all messages in chronological order, numbered from the start of the run
+            dropped = st.session_state.event_count - len(st.session_state.analysis_results)
+            for i, result in enumerate(st.session_state.analysis_results, start=dropped):
                 if "messages" in result and result["messages"]:
                     message = result["messages"][-1]
-                    sender = result.get("last_sender", "System")
+                    sender = result.get("sender", "System")
                     
                     with st.expander(f"Step {i+1}: {sender}", expanded=False):
                         try:
@@ -437,12 +564,11 @@ def main():
             
             # List files in working directory
             if os.path.exists(WORKING_DIRECTORY):
-                files = [f for f in os.listdir(WORKING_DIRECTORY) if os.path.isfile(os.path.join(WORKING_DIRECTORY, f))]
+                files = list_working_files(os.path.getmtime(WORKING_DIRECTORY))
                 
                 if files:
-                    for file in files:
+                    for file, file_size in files:
                         file_path = os.path.join(WORKING_DIRECTORY, file)
-                        file_size = os.path.getsize(file_path)
                         
                         col_file1, col_file2, col_file3 = st.columns([3, 1, 1])
                         
@@ -451,17 +577,20 @@ def main():
                         with col_file2:
                             st.write(f"{file_size} bytes")
                         with col_file3:
-                            # Download button
-                            try:
-                                with open(file_path, "rb") as f:
-                                    st.download_button(
-                                        "⬇️ Download",
-                                        f.read(),
-                                        file_name=file,
-                                        key=f"download_{file}"
-                                    )
-                            except:
-                                st.write("N/A")
+                            # Only read the file once the user asks to download it
+                            prepared_key = f"prepared_{file}"
+                            if st.session_state.get(prepared_key) or st.button("📦 Prepare", key=f"prepare_{file}"):
+                                st.session_state[prepared_key] = True
+                                try:
+                                    with open(file_path, "rb") as f:
+                                        st.download_button(
+                                            "⬇️ Download",
+                                            f.read(),
+                                            file_name=file,
+                                            key=f"download_{file}"
+                                        )
+                                except:
+                                    st.write("N/A")
                 else:
                     st.info("No files created.")
         
@@ -470,7 +599,7 @@ def main():
             
             # Look for image files and display them
             if os.path.exists(WORKING_DIRECTORY):
-                image_files = [f for f in os.listdir(WORKING_DIRECTORY) 
+                image_files = [f for f, _ in list_working_files(os.path.getmtime(WORKING_DIRECTORY))
                              if f.lower().endswith(('.png', '.jpg', '.jpeg', '.svg'))]
                 
                 if image_files:
@@ -478,7 +607,11 @@ def main():
                         img_path = os.path.join(WORKING_DIRECTORY, img_file)
                         st.markdown(f"#### {img_file}")
                         try:
-                            st.image(img_path, use_column_width=True)
+                            # Pillow cannot rasterize SVG, so those are passed through as-is
+                            if img_file.lower().endswith('.svg'):
+                                st.image(img_path, use_column_width=True)
+                            else:
+                                st.image(thumbnail(img_path, os.path.getmtime(img_path)), use_column_width=True)
                         except:
                             st.error(f"Cannot display {img_file}")
                 else:
@@ -492,6 +625,11 @@ def main():
         <small>Intelligent multi-agent data analysis system with real-time interaction</small>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Rerun periodically while the analysis is in progress; widget interactions interrupt the wait
+    if analysis_running:
+        time.sleep(ANALYSIS_POLL_INTERVAL)
+        st.rerun()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
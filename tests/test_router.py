@@ -0,0 +1,61 @@
+import unittest
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from core.node import agent_node
+from core.router import MAX_REVISIONS, QualityReview_router
+
+
+class FakeAgent:
+    """Agent stub that always returns the same output"""
+    def __init__(self, output):
+        self.output = output
+
+    def invoke(self, state):
+        return {"output": self.output}
+
+
+def review_state(agent_name, verdict, revision_counts=None):
+    """Build a state whose last two messages are an agent's work and its quality review"""
+    state = {
+        "messages": [
+            HumanMessage(content="Analyse the data"),
+            AIMessage(content="work", name=agent_name),
+            AIMessage(content=verdict, name="quality_review_agent"),
+        ],
+        "needs_revision": False,
+        "sender": "quality_review_agent",
+    }
+    if revision_counts is not None:
+        state["revision_counts"] = revision_counts
+    return state
+
+
+class QualityReviewRouterTest(unittest.TestCase):
+    def test_revision_routes_back_to_reviewed_node(self):
+        self.assertEqual(QualityReview_router(review_state("code_agent", "REVISION: fix the plot")), "Coder")
+
+    def test_approval_routes_to_note_taker(self):
+        self.assertEqual(QualityReview_router(review_state("code_agent", "CONTINUE: looks good")), "NoteTaker")
+
+    def test_revision_limit_routes_to_note_taker(self):
+        state = review_state("report_agent", "REVISION: again", {"Report": MAX_REVISIONS + 1})
+        self.assertEqual(QualityReview_router(state), "NoteTaker")
+
+    def test_revision_loop_is_bounded(self):
+        # A reviewer that never approves gets at most MAX_REVISIONS rounds before moving on
+        state = {"messages": [HumanMessage(content="Analyse the data")], "needs_revision": False}
+        reviewer = FakeAgent("REVISION: not good enough")
+        revisions = 0
+        while True:
+            state = agent_node(state, FakeAgent("work"), "code_agent")
+            state = agent_node(state, reviewer, "quality_review_agent")
+            if QualityReview_router(state) != "Coder":
+                break
+            revisions += 1
+            self.assertLessEqual(revisions, MAX_REVISIONS)
+        self.assertEqual(revisions, MAX_REVISIONS)
+
+
+if __name__ == "__main__":
+    unittest.main()
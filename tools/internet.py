@@ -1,24 +1,56 @@
 import os
+import asyncio
+import atexit
+import hashlib
+import importlib.util
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.tools import tool
-from langchain_community.document_loaders import WebBaseLoader, FireCrawlLoader
 from typing import Annotated, List
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
+from requests.adapters import HTTPAdapter
 from logger import setup_logger
-from load_cfg import FIRECRAWL_API_KEY, CHROMEDRIVER_PATH
+from load_cfg import FIRECRAWL_API_KEY, CHROMEDRIVER_PATH, SCRAPE_CACHE_DIR
 
-# Try to import selenium with fallback
+# Check for selenium without importing it; it is imported lazily on first Selenium search
+SELENIUM_AVAILABLE = importlib.util.find_spec("selenium") is not None
+
+# Headless Chrome driver shared by Selenium searches, created on first use
+_DRIVER = None
+_DRIVER_LOCK = threading.Lock()
+
+# Try to import aiohttp for concurrent page fetching
 try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-    SELENIUM_AVAILABLE = True
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
 except ImportError:
-    SELENIUM_AVAILABLE = False
+    AIOHTTP_AVAILABLE = False
 
 # Set up logger
 logger = setup_logger()
 
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Use the C-based lxml parser for search result pages when it is installed
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+# Search results live in div.g blocks; skip building the rest of the page
+_RESULT_STRAINER = SoupStrainer("div", class_="g")
+
+# Scraped page contents are cached on disk (see SCRAPE_CACHE_DIR) so repeated analyses skip refetching;
+# entries older than this many seconds are fetched again
+SCRAPE_CACHE_TTL = 24 * 60 * 60
+
+# Shared HTTP session so repeated searches reuse pooled keep-alive connections
+_HTTP = requests.Session()
+_HTTP.headers.update(HEADERS)
+_HTTP.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+_HTTP.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
 @tool
 def google_search(query: Annotated[str, "The search query to use"]) -> str:
     """
@@ -64,8 +96,26 @@ def google_search(query: Annotated[str, "The search query to use"]) -> str:
         logger.error(f"Critical error during search: {str(e)}")
         return f'Search Error: {e}. Please check system configuration or try again later.'
 
-def _google_search_selenium(query: str) -> str:
-    """Perform Google search using Selenium"""
+def _quit_driver() -> None:
+    """Shut down the shared Chrome driver, if any"""
+    global _DRIVER
+    if _DRIVER is not None:
+        try:
+            _DRIVER.quit()
+        except Exception as e:
+            logger.warning(f"Error shutting down Chrome driver: {str(e)}")
+        _DRIVER = None
+
+def _get_driver():
+    """Return the shared Chrome driver, starting it on first use. Callers must hold _DRIVER_LOCK."""
+    global _DRIVER
+    if _DRIVER is not None:
+        return _DRIVER
+
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
@@ -77,14 +127,28 @@ def _google_search_selenium(query: str) -> str:
     
     service = Service(CHROMEDRIVER_PATH)
 
-    with webdriver.Chrome(options=chrome_options, service=service) as driver:
-        url = f"https://www.google.com/search?q={query}"
+    _DRIVER = webdriver.Chrome(options=chrome_options, service=service)
+    logger.info("Started shared Chrome driver")
+    return _DRIVER
+
+atexit.register(_quit_driver)
+
+def _google_search_selenium(query: str) -> str:
+    """Perform Google search using Selenium"""
+    url = f"https://www.google.com/search?q={query}"
+    with _DRIVER_LOCK:
+        driver = _get_driver()
         logger.debug(f"Accessing URL: {url}")
-        driver.get(url)
-        html = driver.page_source
+        try:
+            driver.get(url)
+            html = driver.page_source
+        except Exception:
+            # Drop a broken driver so the next search starts a fresh one
+            _quit_driver()
+            raise
 
-    soup = BeautifulSoup(html, 'html.parser')
-    search_results = soup.select('.g') 
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_RESULT_STRAINER)
+    search_results = soup.select('.g')
     search = ""
     for result in search_results[:5]:
         title_element = result.select_one('h3')
@@ -103,17 +167,13 @@ def _google_search_requests(query: str) -> str:
     logger.info("Using requests-based search fallback")
     
     # This is a simplified search - in production you might want to use Google Custom Search API
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
         # Note: This is a basic implementation. For production, use Google Custom Search API
         search_url = f"https://www.google.com/search?q={query}"
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = _HTTP.get(search_url, timeout=10)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=_RESULT_STRAINER)
             results = []
             
             # Simple extraction - may need adjustment based on Google's current structure
@@ -160,12 +220,45 @@ def _duckduckgo_search(query: str) -> str:
     except Exception as e:
         raise Exception(f"DuckDuckGo search failed: {str(e)}")
 
+async def _afetch(session, url: str) -> str:
+    """Fetch a single URL and return its HTML"""
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        response.raise_for_status()
+        return await response.text()
+
+async def _afetch_all(urls: List[str]) -> list:
+    """Fetch all URLs concurrently, returning the HTML or the exception for each URL"""
+    async with aiohttp.ClientSession(headers=HEADERS) as session:
+        return await asyncio.gather(*[_afetch(session, url) for url in urls], return_exceptions=True)
+
+def _event_loop_running() -> bool:
+    """Return True if an asyncio event loop is running in the current thread"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def _scrape_webpages_concurrently(urls: List[str]) -> str:
+    """Fetch the URLs in parallel and extract their text, skipping pages that fail"""
+    pages = asyncio.run(_afetch_all(urls))
+    contents = []
+    for url, page in zip(urls, pages):
+        if isinstance(page, Exception):
+            logger.warning(f"Failed to fetch {url}: {str(page)}")
+            continue
+        contents.append(BeautifulSoup(page, 'html.parser').get_text())
+    if not contents:
+        raise Exception(f"Failed to fetch any of the webpages: {urls}")
+    return "\n\n".join([f'\n{content}\n' for content in contents])
+
 @tool
 def scrape_webpages(urls: Annotated[List[str], "List of URLs to scrape"]) -> str:
     """
-    Scrape the provided web pages for detailed information using WebBaseLoader.
+    Scrape the provided web pages for detailed information.
 
-    This function uses the WebBaseLoader to load and scrape the content of the provided URLs.
+    Pages are fetched concurrently with aiohttp when it is available (and no event loop is
+    already running in this thread); otherwise WebBaseLoader loads them one by one.
 
     Args:
     urls (List[str]): A list of URLs to scrape.
@@ -178,27 +271,66 @@ def scrape_webpages(urls: Annotated[List[str], "List of URLs to scrape"]) -> str
     """
     try:
         logger.info(f"Scraping webpages: {urls}")
-        loader = WebBaseLoader(urls)
-        docs = loader.load()
-        content = "\n\n".join([f'\n{doc.page_content}\n' for doc in docs])
+        if AIOHTTP_AVAILABLE and not _event_loop_running():
+            content = _scrape_webpages_concurrently(urls)
+        else:
+            from langchain_community.document_loaders import WebBaseLoader
+            loader = WebBaseLoader(urls)
+            docs = loader.load()
+            content = "\n\n".join([f'\n{doc.page_content}\n' for doc in docs])
         logger.info("Webpage scraping completed successfully")
         return content
     except Exception as e:
         logger.error(f"Error during webpage scraping: {str(e)}")
         raise  # Re-raise the exception to be caught by the calling function
 
+def _scrape_cache_path(url: str) -> str:
+    """Return the on-disk cache file for a URL"""
+    return os.path.join(SCRAPE_CACHE_DIR, hashlib.blake2b(url.encode()).hexdigest() + ".txt")
+
+def _firecrawl_scrape_one(url: str) -> str:
+    """Scrape a single URL with FireCrawl, reusing the on-disk cache while it is fresh"""
+    cache_path = _scrape_cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(cache_path) < SCRAPE_CACHE_TTL:
+            logger.debug(f"Using cached FireCrawl content for {url}")
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return f.read()
+    except OSError:
+        pass  # Not cached yet
+
+    from langchain_community.document_loaders import FireCrawlLoader
+    loader = FireCrawlLoader(
+        api_key=FIRECRAWL_API_KEY,
+        url=url,
+        mode="scrape"
+    )
+    content = "\n\n".join(doc.page_content for doc in loader.load())
+
+    # Don't cache failed or empty scrapes; they should be retried on the next run
+    if not content.strip():
+        return content
+
+    # Write to a temporary file and rename it so concurrent readers never see a partial entry
+    os.makedirs(SCRAPE_CACHE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=SCRAPE_CACHE_DIR, suffix=".tmp", delete=False) as f:
+        f.write(content)
+    os.replace(f.name, cache_path)
+    return content
+
 @tool
 def FireCrawl_scrape_webpages(urls: Annotated[List[str], "List of URLs to scrape"]) -> str:
     """
     Scrape the provided web pages for detailed information using FireCrawlLoader.
 
-    This function uses the FireCrawlLoader to load and scrape the content of the provided URLs.
+    Each URL is scraped once and cached in memory and on disk; multiple uncached URLs
+    are scraped concurrently.
 
     Args:
     urls (List[str]): A list of URLs to scrape.
 
     Returns:
-    Any: The result of the FireCrawlLoader's load operation.
+    str: A string containing the concatenated content of all scraped web pages.
 
     Raises:
     Exception: If there's an error during the scraping process or if the API key is not set.
@@ -208,14 +340,10 @@ def FireCrawl_scrape_webpages(urls: Annotated[List[str], "List of URLs to scrape
 
     try:
         logger.info(f"Scraping webpages using FireCrawl: {urls}")
-        loader = FireCrawlLoader(
-            api_key=FIRECRAWL_API_KEY,
-            url=urls,
-            mode="scrape"
-        )
-        result = loader.load()
+        with ThreadPoolExecutor(max_workers=min(8, max(len(urls), 1))) as pool:
+            contents = list(pool.map(_firecrawl_scrape_one, urls))
         logger.info("FireCrawl scraping completed successfully")
-        return result
+        return "\n\n".join([f'\n{content}\n' for content in contents])
     except Exception as e:
         logger.error(f"Error during FireCrawl scraping: {str(e)}")
         raise  # Re-raise the exception to be caught by the calling function